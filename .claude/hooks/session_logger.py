@@ -22,15 +22,63 @@ import os
 import re
 import sys
 import time
-from datetime import datetime
 from pathlib import Path
 
+# orjson is optional; fall back to the stdlib json module when it is absent.
+# Both variants work on UTF-8 bytes, and orjson's decode error subclasses
+# json.JSONDecodeError.
+try:
+    import orjson
+
+    def json_loads(data: bytes):
+        return orjson.loads(data)
+
+    def json_dumps(obj, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+except ImportError:
+
+    def json_loads(data: bytes):
+        return json.loads(data)
+
+    def json_dumps(obj, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
 # State file location
 STATE_FILE = Path.home() / ".claude" / "session_state.json"
+# Append-only event log; message_count is the number of "msg" records
+STATE_LOG = STATE_FILE.with_suffix(".jsonl")
+# Exists only while a session is active and holds the log file path, so the
+# logging hooks never need to decode the JSON state
+ACTIVE_SENTINEL = STATE_FILE.with_suffix(".active")
+
+# Metadata extraction pattern, compiled once at import. Search phrases come
+# first so their quoted query is not consumed as a quoted file reference.
+_EXTRACT_RE = re.compile(
+    r'(?i:search(?:ed|ing)?\s+(?:for\s+)?'  # search for "..."
+    r'|google[d]?\s+'  # google "..."
+    r'|look(?:ed|ing)?\s+up\s+)'  # look up "..."
+    r'["\'](?P<search>[^"\']+)["\']'
+    r'|`(?P<bt>[^`]+\.[a-zA-Z]{1,10})`'  # `filename.ext`
+    r"|['\"](?P<q>[^'\"]+\.[a-zA-Z]{1,10})['\"]"  # 'file' or "file"
+)
+# A search query that is itself a quoted file name also counts as a reference
+_QUOTED_FILE_RE = re.compile(r"[^'\"]+\.[a-zA-Z]{1,10}")
+# Bare paths are whitespace-separated tokens ending in one of these extensions
+_BARE_PATH_EXTS = frozenset({"java", "md", "yaml", "yml", "xml", "json", "py", "sh"})
+# Trailing line/column suffix on code citations, e.g. src/Main.java:12:5
+_LINE_SUFFIX_RE = re.compile(r":\d+(?::\d+)?$")
 
 
 def get_project_root() -> Path:
-    """Find project root by looking for .claude directory."""
+    """Find project root by looking for .claude directory.
+
+    Claude Code exports CLAUDE_PROJECT_DIR to hooks; use it when present
+    to avoid walking up the directory tree.
+    """
+    project_dir = os.environ.get("CLAUDE_PROJECT_DIR")
+    if project_dir and (Path(project_dir) / ".claude").is_dir():
+        return Path(project_dir)
     cwd = Path.cwd()
     for parent in [cwd] + list(cwd.parents):
         if (parent / ".claude").is_dir():
@@ -42,7 +90,7 @@ def load_state() -> dict:
     """Load session state from file."""
     if STATE_FILE.exists():
         try:
-            return json.loads(STATE_FILE.read_text())
+            return json_loads(STATE_FILE.read_bytes())
         except (json.JSONDecodeError, IOError):
             pass
     return {}
@@ -51,55 +99,113 @@ def load_state() -> dict:
 def save_state(state: dict) -> None:
     """Save session state to file."""
     STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+    STATE_FILE.write_bytes(json_dumps(state, indent=True))
+
+
+def append_bytes(path: Path, data: bytes) -> None:
+    """Append bytes to a file with a single unbuffered O_APPEND write."""
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def append_event(event: str) -> None:
+    """Append a single event record to the state log."""
+    append_bytes(STATE_LOG, json_dumps({"t": event, "ts": time.time()}) + b"\n")
+
+
+def count_messages(state: dict) -> int:
+    """Replay the state log and count logged messages.
+
+    State written before the log existed carries its own message_count,
+    which is added to the replayed total.
+    """
+    count = state.get("message_count", 0)
+    try:
+        with open(STATE_LOG, "rb") as f:
+            for line in f:
+                try:
+                    if json_loads(line).get("t") == "msg":
+                        count += 1
+                except json.JSONDecodeError:
+                    continue
+    except IOError:
+        pass
+    return count
+
+
+def get_active_log_file() -> str:
+    """Get the active session's log file path, or "" if no session is active.
+
+    Sessions started before the sentinel existed only have the JSON state;
+    the sentinel is written from it the first time it is missing.
+    """
+    try:
+        return ACTIVE_SENTINEL.read_text().strip()
+    except IOError:
+        pass
+    if not STATE_FILE.exists():
+        return ""
+    state = load_state()
+    if not state.get("active"):
+        return ""
+    ACTIVE_SENTINEL.write_text(state["log_file"])
+    return state["log_file"]
 
 
 def clear_state() -> None:
     """Clear session state."""
-    if STATE_FILE.exists():
-        STATE_FILE.unlink()
+    for path in (ACTIVE_SENTINEL, STATE_FILE, STATE_LOG):
+        if path.exists():
+            path.unlink()
+
 
+def get_timestamp(when: time.struct_time) -> str:
+    """Format a local time as a timestamp in standard format."""
+    return time.strftime("%Y-%m-%d_%H%M", when)
 
-def get_timestamp() -> str:
-    """Get current timestamp in standard format."""
-    return datetime.now().strftime("%Y-%m-%d_%H%M")
 
+def get_start_epoch(state: dict) -> float:
+    """Get session start as epoch seconds, parsing start_time for older state."""
+    start_epoch = state.get("start_epoch")
+    if start_epoch is None:
+        start_time = time.strptime(state["start_time"][:19], "%Y-%m-%dT%H:%M:%S")
+        start_epoch = time.mktime(start_time)
+    return start_epoch
 
-def get_discussions_dir() -> Path:
+
+def get_discussions_dir(project_root: Path) -> Path:
     """Get or create discussions directory."""
-    project_root = get_project_root()
     discussions_dir = project_root / "discussions"
     discussions_dir.mkdir(parents=True, exist_ok=True)
     return discussions_dir
 
 
-def extract_file_references(content: str) -> list[str]:
-    """Extract file paths mentioned in content."""
-    patterns = [
-        r'`([^`]+\.[a-zA-Z]{1,10})`',  # `filename.ext`
-        r"['\"]([^'\"]+\.[a-zA-Z]{1,10})['\"]",  # 'file' or "file"
-        r'(?:^|\s)(\S+\.(?:java|md|yaml|yml|xml|json|py|sh))',  # bare paths
-    ]
+def extract_metadata(content: str) -> tuple[list[str], list[str]]:
+    """Extract referenced file paths and web search queries from content."""
     files = set()
-    for pattern in patterns:
-        for match in re.findall(pattern, content):
-            if not match.startswith("http"):
-                files.add(match)
-    return sorted(files)
-
-
-def extract_search_queries(content: str) -> list[str]:
-    """Extract web search queries from content."""
-    patterns = [
-        r'search(?:ed|ing)?\s+(?:for\s+)?["\']([^"\']+)["\']',
-        r'google[d]?\s+["\']([^"\']+)["\']',
-        r'look(?:ed|ing)?\s+up\s+["\']([^"\']+)["\']',
-    ]
     queries = set()
-    for pattern in patterns:
-        for match in re.findall(pattern, content, re.IGNORECASE):
-            queries.add(match)
-    return sorted(queries)
+    for match in _EXTRACT_RE.finditer(content):
+        query = match.group("search")
+        if query is not None:
+            queries.add(query)
+            token = query if _QUOTED_FILE_RE.fullmatch(query) else None
+        else:
+            token = match.group("bt") or match.group("q")
+        if token and not token.startswith("http"):
+            files.add(token)
+    for token in content.split():
+        token = token.lstrip("([*`'\"").rstrip(".,;:!?)]*`'\"")
+        if token.startswith("_") and token.endswith("_"):
+            token = token.strip("_")  # _emphasis_, but leave __init__.py alone
+        token = _LINE_SUFFIX_RE.sub("", token)
+        stem, _, ext = token.rpartition(".")
+        if stem and ext in _BARE_PATH_EXTS and not token.startswith("http"):
+            files.add(token)
+    return sorted(files), sorted(queries)
 
 
 def start_session(session_type: str) -> None:
@@ -110,17 +216,20 @@ def start_session(session_type: str) -> None:
         print(f"Session already active: {state.get('session_type')}", file=sys.stderr)
         sys.exit(1)
 
-    timestamp = get_timestamp()
+    start_epoch = time.time()
+    start_local = time.localtime(start_epoch)
+    timestamp = get_timestamp(start_local)
     session_id = f"{session_type}_{timestamp}"
-    discussions_dir = get_discussions_dir()
+    project_root = get_project_root()
+    discussions_dir = get_discussions_dir(project_root)
     log_file = discussions_dir / f"{session_id}.md"
 
     # Initialize log file
-    log_file.write_text(f"# {session_type.title()} Session\n\n")
     log_file.write_text(
         f"# {session_type.title()} Session\n\n"
-        f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
-        f"---\n\n"
+        f"**Date:** {time.strftime('%Y-%m-%d %H:%M', start_local)}\n\n"
+        f"---\n\n",
+        encoding="utf-8",
     )
 
     # Save state
@@ -129,14 +238,15 @@ def start_session(session_type: str) -> None:
         "session_type": session_type,
         "session_id": session_id,
         "log_file": str(log_file),
-        "start_time": datetime.now().isoformat(),
-        "message_count": 0,
-        "project_root": str(get_project_root()),
+        "start_time": time.strftime("%Y-%m-%dT%H:%M:%S", start_local),
+        "start_epoch": start_epoch,
+        "project_root": str(project_root),
     }
     save_state(state)
+    STATE_LOG.write_bytes(json_dumps({"t": "start", "ts": start_epoch}) + b"\n")
+    ACTIVE_SENTINEL.write_text(str(log_file))
 
-    print(f"Session started: {session_id}")
-    print(f"Log file: {log_file}")
+    sys.stdout.write(f"Session started: {session_id}\nLog file: {log_file}\n")
 
 
 def stop_session() -> None:
@@ -148,50 +258,63 @@ def stop_session() -> None:
         sys.exit(1)
 
     log_file = Path(state["log_file"])
+    message_count = count_messages(state)
 
     # Calculate duration
-    start_time = datetime.fromisoformat(state["start_time"])
-    duration_minutes = int((datetime.now() - start_time).total_seconds() / 60)
+    start_epoch = get_start_epoch(state)
+    duration_minutes = int((time.time() - start_epoch) / 60)
 
     # Read log content for extraction
-    content = log_file.read_text() if log_file.exists() else ""
+    content = log_file.read_text(encoding="utf-8") if log_file.exists() else ""
 
     # Generate metadata file
     meta_file = log_file.with_suffix(".yaml")
-    meta_content = f"""session: {state["session_id"]}
-session_type: {state["session_type"]}
-date: {start_time.strftime("%Y-%m-%d %H:%M")}
-duration_minutes: {duration_minutes}
-message_count: {state["message_count"]}
-
-# Auto-extracted (verify and supplement)
-files_referenced:
-{chr(10).join(f"  - {f}" for f in extract_file_references(content)) or "  # none detected"}
-
-web_searches:
-{chr(10).join(f'  - "{q}"' for q in extract_search_queries(content)) or "  # none detected"}
-
-# Fill in manually or ask AI to complete
-topics:
-  - # topic 1
-  - # topic 2
-
-key_decisions:
-  - # decision 1
-
-action_items:
-  - # action 1
-
-highlights:
-  - # key insight 1
-"""
-    meta_file.write_text(meta_content)
-
-    print(f"Session stopped: {state['session_id']}")
-    print(f"Duration: {duration_minutes} minutes")
-    print(f"Messages: {state['message_count']}")
-    print(f"Log: {log_file}")
-    print(f"Metadata: {meta_file}")
+    lines = [
+        f"session: {state['session_id']}",
+        f"session_type: {state['session_type']}",
+        f"date: {time.strftime('%Y-%m-%d %H:%M', time.localtime(start_epoch))}",
+        f"duration_minutes: {duration_minutes}",
+        f"message_count: {message_count}",
+        "",
+        "# Auto-extracted (verify and supplement)",
+        "files_referenced:",
+    ]
+    files, queries = extract_metadata(content)
+    if files:
+        lines.extend(f"  - {f}" for f in files)
+    else:
+        lines.append("  # none detected")
+    lines += ["", "web_searches:"]
+    if queries:
+        lines.extend(f'  - "{q}"' for q in queries)
+    else:
+        lines.append("  # none detected")
+    lines += [
+        "",
+        "# Fill in manually or ask AI to complete",
+        "topics:",
+        "  - # topic 1",
+        "  - # topic 2",
+        "",
+        "key_decisions:",
+        "  - # decision 1",
+        "",
+        "action_items:",
+        "  - # action 1",
+        "",
+        "highlights:",
+        "  - # key insight 1",
+        "",
+    ]
+    meta_file.write_text("\n".join(lines), encoding="utf-8")
+
+    sys.stdout.write(
+        f"Session stopped: {state['session_id']}\n"
+        f"Duration: {duration_minutes} minutes\n"
+        f"Messages: {message_count}\n"
+        f"Log: {log_file}\n"
+        f"Metadata: {meta_file}\n"
+    )
 
     # Clear state
     clear_state()
@@ -205,24 +328,48 @@ def status() -> None:
         print("No active session")
         return
 
-    start_time = datetime.fromisoformat(state["start_time"])
-    duration = int((datetime.now() - start_time).total_seconds() / 60)
+    duration = int((time.time() - get_start_epoch(state)) / 60)
 
-    print(f"Active session: {state['session_id']}")
-    print(f"Type: {state['session_type']}")
-    print(f"Duration: {duration} minutes")
-    print(f"Messages: {state['message_count']}")
-    print(f"Log: {state['log_file']}")
+    sys.stdout.write(
+        f"Active session: {state['session_id']}\n"
+        f"Type: {state['session_type']}\n"
+        f"Duration: {duration} minutes\n"
+        f"Messages: {count_messages(state)}\n"
+        f"Log: {state['log_file']}\n"
+    )
 
 
 def read_hook_input() -> dict:
     """Read JSON input from stdin (hook data)."""
     try:
-        return json.loads(sys.stdin.read())
+        return json_loads(sys.stdin.buffer.read())
     except (json.JSONDecodeError, IOError):
         return {}
 
 
+def iter_lines_reversed(path: Path, chunk_size: int = 64 * 1024):
+    """Yield the lines of a file as bytes, last line first, reading in chunks."""
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        # Pieces of the current partial line, last piece first; joined once
+        # when the line is complete so long lines are not re-copied per chunk
+        pieces = []
+        while position > 0:
+            read_size = min(chunk_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = f.read(read_size).split(b"\n")
+            if len(lines) == 1:
+                pieces.append(lines[0])
+                continue
+            pieces.append(lines.pop())
+            yield b"".join(reversed(pieces))
+            # First piece may be a partial line; carry it into the next chunk
+            pieces = [lines.pop(0)]
+            yield from reversed(lines)
+        yield b"".join(reversed(pieces))
+
+
 def get_last_assistant_message(transcript_path: str) -> str:
     """Extract the last assistant message from the transcript file."""
     try:
@@ -230,35 +377,45 @@ def get_last_assistant_message(transcript_path: str) -> str:
         if not transcript.exists():
             return ""
 
-        lines = transcript.read_text().strip().split("\n")
-        last_assistant_content = ""
-        for line in lines:
-            if not line:
+        # Scan from the end so only the tail of a long transcript is decoded
+        for line in iter_lines_reversed(transcript):
+            # Cheap prefilter: only decode lines that could be assistant entries
+            if b'"assistant"' not in line:
                 continue
             try:
-                entry = json.loads(line)
-                if entry.get("type") == "assistant" and "message" in entry:
-                    msg = entry["message"]
-                    if "content" in msg:
-                        # Extract text content from content blocks
-                        content_parts = []
-                        for block in msg["content"]:
-                            if isinstance(block, dict) and block.get("type") == "text":
-                                content_parts.append(block.get("text", ""))
-                            elif isinstance(block, str):
-                                content_parts.append(block)
-                        last_assistant_content = "\n".join(content_parts)
+                entry = json_loads(line)
             except json.JSONDecodeError:
                 continue
-        return last_assistant_content
+            if entry.get("type") == "assistant" and "message" in entry:
+                msg = entry["message"]
+                if "content" in msg:
+                    # Extract text content from content blocks
+                    content_parts = []
+                    for block in msg["content"]:
+                        if isinstance(block, dict) and block.get("type") == "text":
+                            content_parts.append(block.get("text", ""))
+                        elif isinstance(block, str):
+                            content_parts.append(block)
+                    return "\n".join(content_parts)
+        return ""
     except Exception:
         return ""
 
 
+def record_message(log_file: Path, formatted: str) -> None:
+    """Append a formatted message to the session log and count it.
+
+    Each hook runs in its own process and writes exactly once, so both
+    files are opened once per call rather than kept open.
+    """
+    append_bytes(log_file, formatted.encode("utf-8"))
+    append_event("msg")
+
+
 def log_user_prompt() -> None:
     """Log user prompt from UserPromptSubmit hook."""
-    state = load_state()
-    if not state.get("active"):
+    log_file = get_active_log_file()
+    if not log_file:
         return
 
     hook_input = read_hook_input()
@@ -266,44 +423,45 @@ def log_user_prompt() -> None:
     if not content:
         return
 
-    log_file = Path(state["log_file"])
     formatted = f"\n**User:**\n\n{content}\n\n---\n"
-
-    with open(log_file, "a") as f:
-        f.write(formatted)
-
-    state["message_count"] = state.get("message_count", 0) + 1
-    save_state(state)
+    record_message(Path(log_file), formatted)
 
 
 def log_assistant_response() -> None:
     """Log assistant response from Stop hook."""
-    state = load_state()
-    if not state.get("active"):
+    log_file = get_active_log_file()
+    if not log_file:
         return
 
     hook_input = read_hook_input()
-    transcript_path = hook_input.get("transcript_path", "")
+    transcript_path = hook_input.get("transcript_path") or ""
 
-    # Retry with delay - transcript may not be fully written yet
+    # Poll with backoff - transcript may not be fully written yet.
+    # Only re-read when the file has grown since the last attempt.
     content = ""
-    for _ in range(5):
-        content = get_last_assistant_message(transcript_path)
-        if content:
+    last_size = -1
+    delay = 0.01
+    deadline = time.monotonic() + 1.0
+    while True:
+        try:
+            size = os.stat(transcript_path).st_size
+        except (OSError, TypeError, ValueError):
+            size = -1
+        if size > last_size:
+            content = get_last_assistant_message(transcript_path)
+            if content:
+                break
+            last_size = size
+        if time.monotonic() >= deadline:
             break
-        time.sleep(0.2)  # Wait 200ms between retries
+        time.sleep(delay)
+        delay = min(delay * 2, 0.2)
 
     if not content:
         return
 
-    log_file = Path(state["log_file"])
     formatted = f"\n**Assistant:**\n\n{content}\n\n---\n"
-
-    with open(log_file, "a") as f:
-        f.write(formatted)
-
-    state["message_count"] = state.get("message_count", 0) + 1
-    save_state(state)
+    record_message(Path(log_file), formatted)
 
 
 def main():